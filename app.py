@@ -7,6 +7,7 @@ Includes:
 - One‑time download of picked media to local cache (**/cache/photos/** by default).
 - Screensaver plays from local cache 24/7; falls back to remote proxy when cache is empty.
 - HEIC/HEIF → JPEG conversion on download (if `pillow-heif` available) and on-the-fly in proxy.
+- Proxy responses are spooled to a bounded disk cache (**PROXY_CACHE_DIR**), so later loops are local.
 - YouTube music: single‑video loop enforced (`playlist=VIDEO_ID`), playlist restart on END,
   watchdog, auto‑hide panel, title polling, working controls & shortcuts.
 
@@ -16,32 +17,93 @@ Trimmed:
 
 import os
 import time
+import calendar
 import json
 import logging
+import threading
 from urllib.parse import urlencode
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import io
+import gzip
+import hashlib
+import mmap
 import shutil
+import tempfile
+import uuid
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import (
-    Flask, redirect, request, session, url_for,
-    render_template_string, flash, jsonify, Response, abort, send_file
+    Flask, redirect, request, session, url_for, g,
+    render_template, flash, Response, abort, send_file, stream_with_context
 )
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import is_resource_modified
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
 from dotenv import load_dotenv
 
-# Optional HEIC/HEIF decoding via Pillow + pillow-heif
+# Optional HEIC/HEIF decoding via Pillow + pillow-heif. The native libs are
+# heavy, so they are imported on first use (and prewarmed off-thread below)
+# rather than at module import.
+Image = None
+HEIF_ENABLED = False
+_heif_lock = threading.Lock()
+_heif_loaded = False
+# Optional libjpeg-turbo encoder (PyTurboJPEG + numpy) for the HEIC→JPEG step;
+# Pillow's encoder is used when it isn't installed
+_tj = None
+_np = None
+_TJPF_RGB = 0
+
+def _ensure_heif() -> bool:
+    global Image, HEIF_ENABLED, _heif_loaded, _tj, _np, _TJPF_RGB
+    if _heif_loaded:
+        return HEIF_ENABLED
+    with _heif_lock:
+        if not _heif_loaded:
+            try:
+                from PIL import Image as _Image
+                Image = _Image
+                import pillow_heif
+                pillow_heif.register_heif_opener()
+                HEIF_ENABLED = True
+            except Exception:
+                HEIF_ENABLED = False
+            try:
+                import numpy
+                import turbojpeg
+                _tj, _np, _TJPF_RGB = turbojpeg.TurboJPEG(), numpy, turbojpeg.TJPF_RGB
+            except Exception:
+                _tj = None
+            _heif_loaded = True
+    return HEIF_ENABLED
+
+threading.Thread(target=_ensure_heif, name="heif-import", daemon=True).start()
+
+# Fast JSON via orjson; falls back to a stdlib stand-in with the same
+# bytes-in/bytes-out surface (only the options used here)
 try:
-    from PIL import Image
-    try:
-        import pillow_heif
-        pillow_heif.register_heif_opener()
-        HEIF_ENABLED = True
-    except Exception:
-        HEIF_ENABLED = False
-except Exception:
-    Image = None
-    HEIF_ENABLED = False
+    import orjson
+except ImportError:
+    class orjson:
+        OPT_INDENT_2 = 1
+        OPT_APPEND_NEWLINE = 2
+        OPT_SORT_KEYS = 4
+
+        @staticmethod
+        def dumps(obj, default=None, option: int = 0) -> bytes:
+            s = json.dumps(obj, ensure_ascii=False, default=default, sort_keys=bool(option & 4),
+                           indent=2 if option & 1 else None,
+                           separators=None if option & 1 else (",", ":"))
+            return (s + "\n" if option & 2 else s).encode("utf-8")
+
+        @staticmethod
+        def loads(data):
+            return json.loads(bytes(data))
 
 load_dotenv()
 
@@ -67,9 +129,27 @@ YT_VOLUME = int(os.getenv("YT_VOLUME", "60"))
 # --- Server-side token store (for kiosk localhost fetches) ---
 TOKENS_STORE = os.getenv("TOKENS_STORE", "tokens.json")
 DISABLE_SESSION_AUTH_FOR_LOCAL = os.getenv("DISABLE_SESSION_AUTH_FOR_LOCAL", "true").lower() == "true"
+# Background refresher renews the server token when it has less than this left
+TOKEN_REFRESH_MARGIN_SEC = int(os.getenv("TOKEN_REFRESH_MARGIN_SEC", "300"))
 
 # --- Auto-renew buffer for Picker sessions ---
 SESSION_RENEW_BUFFER_SEC = int(os.getenv("SESSION_RENEW_BUFFER_SEC", "60"))
+# How long /api/poll holds a request open waiting for the selection (long-poll)
+POLL_HOLD_SECONDS = int(os.getenv("POLL_HOLD_SECONDS", "25"))
+# At most this many polls are held open at once; the rest answer after one check
+POLL_MAX_INFLIGHT = int(os.getenv("POLL_MAX_INFLIGHT", "8"))
+# /api/events (SSE) streams end after this long; EventSource reconnects on its own
+SSE_MAX_SECONDS = int(os.getenv("SSE_MAX_SECONDS", "300"))
+# While nothing changes, the stream's upstream check backs off from the Picker's
+# pollInterval by x1.5 per round up to this ceiling
+SSE_POLL_MAX_SEC = float(os.getenv("SSE_POLL_MAX_SEC", "30"))
+# Upper bound on the /fetch-selected page loop; past it the fetch is abandoned
+# (the Picker session is kept for a retry)
+FETCH_PAGES_DEADLINE_SEC = int(os.getenv("FETCH_PAGES_DEADLINE_SEC", "120"))
+# Parallel downloads into the local cache (capped below SESSION's pool_maxsize)
+DOWNLOAD_WORKERS = max(1, min(int(os.getenv("DOWNLOAD_WORKERS", "8")), 16))
+# Read/write size when streaming downloads to disk
+DOWNLOAD_CHUNK = 256 * 1024
 
 # Force crop param to encourage JPEG derivatives
 FORCE_CROP_PARAM = os.getenv("FORCE_CROP_PARAM", "true").lower() == "true"
@@ -79,47 +159,205 @@ CACHE_DIR = os.getenv("CACHE_DIR", "/cache/photos/")
 CACHE_INDEX = os.path.join(CACHE_DIR, "cache_index.json")
 DL_WIDTH = int(os.getenv("DL_WIDTH", "1280"))
 DL_HEIGHT = int(os.getenv("DL_HEIGHT", "800"))
+# Size suffix for cache downloads (same form build_media_url produces), built once
+_DL_SUFFIX = f"=w{DL_WIDTH}-h{DL_HEIGHT}" + ("-c" if FORCE_CROP_PARAM else "")
+# HEIC→JPEG output quality (baseline, no optimize pass: cheap to encode on a Pi)
+HEIC_JPEG_QUALITY = int(os.getenv("HEIC_JPEG_QUALITY", "85"))
+
+# --- Proxy disk cache (/content responses, served locally after first fetch) ---
+PROXY_CACHE_DIR = os.getenv("PROXY_CACHE_DIR", os.path.join(CACHE_DIR, "proxy"))
+PROXY_CACHE_TTL_SEC = int(os.getenv("PROXY_CACHE_TTL_SEC", str(12 * 3600)))
+PROXY_CACHE_MAX_BYTES = int(os.getenv("PROXY_CACHE_MAX_MB", "2048")) * 1024 * 1024
+# Concurrent misses for the same rendition wait this long for the first fetch
+PROXY_COLLAPSE_WAIT_SEC = int(os.getenv("PROXY_COLLAPSE_WAIT_SEC", "30"))
+# After each /content hit, warm this many upcoming images into the disk cache (0 = off)
+PREFETCH_AHEAD = int(os.getenv("PREFETCH_AHEAD", "2"))
+# The long side of /content w/h is rounded up to a multiple of this (clamped to
+# [step, 4096]) and the short side scaled by the same factor, so near-identical
+# display sizes share one rendition upstream and in the cache (0 = no snapping)
+CONTENT_DIM_STEP = max(0, int(os.getenv("CONTENT_DIM_STEP", "160")))
+CONTENT_DIM_MAX = 4096
+# (connect, read) timeouts for media fetches: fail fast on a dead host, but give a
+# slow body time between chunks (the read timeout is per socket read, not total)
+MEDIA_FETCH_TIMEOUT = (5, 30)
+# Browser caching for /content and /local. max-age stays short because both
+# /content/<index> and /local/<index> are re-pointed at other items when a new
+# selection is saved; the validators make revalidation cheap and SWR hides it.
+CONTENT_CACHE_CONTROL = os.getenv("CONTENT_CACHE_CONTROL", "private, max-age=1800, stale-while-revalidate=3600")
+
+# --- Response compression (HTML pages / JSON API only; media is already compressed) ---
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "512"))
+GZIP_MIMETYPES = ("application/json", "text/html")
+
+# Behind nginx/Apache with X-Sendfile enabled, let the front-end send cached files
+USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "false").lower() == "true"
+# Behind nginx: internal location aliased to CACHE_DIR (e.g. "/__cache/"); /local
+# then answers with an empty X-Accel-Redirect response and nginx sends the file
+X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX", "")
+
+class OrjsonProvider(DefaultJSONProvider):
+    # jsonify / tojson through orjson. The layouts Flask asks for map onto orjson
+    # options: compact separators (jsonify), indent=2 (debug jsonify,
+    # tojson(indent=2)) and sort_keys; anything else keeps the stdlib path.
+    def dumps(self, obj, **kwargs) -> str:
+        sort_keys = kwargs.pop("sort_keys", False)
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        indent = kwargs.pop("indent", None)
+        separators = kwargs.pop("separators", None)
+        if indent == 2 and separators in (None, (",", ": ")):
+            option |= orjson.OPT_INDENT_2
+        elif indent is not None or separators not in (None, (",", ":")):
+            kwargs.update(indent=indent, separators=separators)
+        if kwargs:
+            return super().dumps(obj, sort_keys=sort_keys, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if not kwargs else super().loads(s, **kwargs)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = SECRET_KEY
+app.config["USE_X_SENDFILE"] = USE_X_SENDFILE
 logging.basicConfig(level=logging.INFO)
 
+# Shared HTTP session: keep-alive + pooled TLS connections to Google endpoints.
+# One pool per host (oauth2, photospicker, the *.googleusercontent.com media hosts),
+# so keep enough pools that media fetches don't evict the API connections.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8, pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+
 # -------------------------- utilities --------------------------
+# mkstemp creates 0600 files and os.replace keeps the mode; committed files get
+# what a plain open() would give, so a front-end (nginx as www-data) can read them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+# Write via temp file + fsync + os.replace so readers never see a torn file;
+# returns False (and touches nothing) when the content is already identical.
+def write_file_atomic(path: str, data: bytes, mode: int = FILE_MODE) -> bool:
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    write_chunks_atomic(path, (data,), mode)
+    return True
+
+
+# Same temp file + fsync + os.replace commit for a body that arrives in chunks;
+# an interrupted write leaves nothing at `path`
+def write_chunks_atomic(path: str, chunks, mode: int = FILE_MODE) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fchmod(f.fileno(), mode)
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+
+
 def ensure_cache_dir():
     os.makedirs(CACHE_DIR, exist_ok=True)
 
 
+# Parsed JSON stores (cache index, selection, tokens) keyed by path and reused while
+# the file's (st_mtime_ns, st_size) is unchanged; the stat itself is skipped when
+# the entry was validated less than JSON_RECHECK_SEC ago. Our own writes update
+# the entry directly, so only out-of-process edits wait for the recheck.
+JSON_RECHECK_SEC = 1.0
+_JSON_CACHE: dict[str, list] = {}  # path -> [(mtime_ns, size), data, checked_at]
+
+
+def _load_json(path: str, default, on_load=None):
+    hit = _JSON_CACHE.get(path)
+    now = time.monotonic()
+    if hit is not None and now - hit[2] < JSON_RECHECK_SEC:
+        return hit[1]
+    try:
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        if hit is not None and hit[0] == key:
+            hit[2] = now
+            return hit[1]
+        with open(path, "rb") as f:
+            if st.st_size == 0:
+                data = default
+            else:
+                # Parse straight from the page cache; no intermediate bytes copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as buf:
+                    data = orjson.loads(buf)
+    except FileNotFoundError:
+        _JSON_CACHE.pop(path, None)
+        return default
+    if on_load is not None:
+        data = on_load(data)
+    _JSON_CACHE[path] = [key, data, now]
+    return data
+
+
+def _store_json(path: str, data, option: int, mode: int = FILE_MODE) -> None:
+    write_file_atomic(path, orjson.dumps(data, option=option), mode)
+    st = os.stat(path)
+    _JSON_CACHE[path] = [(st.st_mtime_ns, st.st_size), data, time.monotonic()]
+
+
+def _json_mtime_ns(path: str) -> int:
+    hit = _JSON_CACHE.get(path)
+    return hit[0][0] if hit is not None else -1
+
+
 def read_cache_index():
-    ensure_cache_dir()
-    if not os.path.exists(CACHE_INDEX):
-        return []
     try:
-        with open(CACHE_INDEX, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_json(CACHE_INDEX, [])
     except Exception:
         app.logger.exception("Failed to read cache_index.json")
         return []
 
 
-def write_cache_index(items):
+# Written once per pick, after all downloads finish: one compact write + os.replace
+def write_cache_index(items) -> bool:
     ensure_cache_dir()
     try:
-        with open(CACHE_INDEX, "w", encoding="utf-8") as f:
-            json.dump(items, f, ensure_ascii=False, indent=2)
+        _store_json(CACHE_INDEX, items, orjson.OPT_APPEND_NEWLINE)
+        return True
     except Exception:
         app.logger.exception("Failed to write cache_index.json")
+        return False
 
 
 def save_media_items(items: list) -> None:
-    with open(SELECTION_STORE, "w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
+    _store_json(SELECTION_STORE, items, orjson.OPT_APPEND_NEWLINE)
+    _with_url_templates(items)
 
 
 def load_media_items() -> list:
-    if not os.path.exists(SELECTION_STORE):
-        return []
-    with open(SELECTION_STORE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _load_json(SELECTION_STORE, [], on_load=_with_url_templates)
+
+
+# Per-selection URL templates keyed by baseUrl, rebuilt whenever the selection is
+# (re)loaded. Kept beside the records rather than on them so the cached item dicts
+# stay exactly what's on disk (/diag dumps them).
+_URL_TMPL: dict[str, tuple[str, bool]] = {}
+
+
+def _with_url_templates(items: list) -> list:
+    global _URL_TMPL
+    _URL_TMPL = {it["baseUrl"]: _url_template(it) for it in items if it.get("baseUrl")}
+    return items
 
 
 def parse_seconds(d, default=5.0):
@@ -130,16 +368,104 @@ def parse_seconds(d, default=5.0):
     return default
 
 
+# Both sides move by one factor so the aspect ratio (and thus the "-c" crop) matches
+# the display; snapping each side on its own would skew the crop
+def _snap_dims(w: int, h: int) -> tuple[int, int]:
+    w, h = max(1, w), max(1, h)
+    long_side = max(w, h)
+    if CONTENT_DIM_STEP:
+        target = max(CONTENT_DIM_STEP, min(CONTENT_DIM_MAX, -(-long_side // CONTENT_DIM_STEP) * CONTENT_DIM_STEP))
+    else:
+        target = min(CONTENT_DIM_MAX, long_side)
+    if target == long_side:
+        return w, h
+    scale = target / long_side
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+@lru_cache(maxsize=128)
+def _safe_int(s, default: int) -> int:
+    # Query-arg coercion; the kiosk only ever sends a handful of distinct values
+    try: return int(s)
+    except (TypeError, ValueError): return default
+
+
+def is_video_mime(m: str) -> bool:
+    m = (m or "").lower()
+    return m.startswith("video/") or ("motion" in m)
+
+
+# Cache file extension per Content-Type, dispatched on the subtype token
+# ("image/heic; foo=bar" -> "heic"); a subtype that doesn't fit the item kind
+# (or an unknown one) gets the kind's default
+_SUBTYPE_EXT = {
+    "jpeg": "jpg", "pjpeg": "jpg", "jpg": "jpg", "png": "png", "gif": "gif", "webp": "webp",
+    "heic": "heic", "heif": "heic", "mp4": "mp4", "webm": "webm", "quicktime": "mp4",
+}
+_VIDEO_EXTS = ("mp4", "webm")
+# ...and back: the Content-Type /local serves each cached file with
+_EXT_MIME = {
+    "jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png", "gif": "image/gif",
+    "webp": "image/webp", "heic": "image/heic", "mp4": "video/mp4", "webm": "video/webm",
+}
+
+
+def ext_for_mime(m: str, kind: str) -> str:
+    sub = (m or "").split(";", 1)[0].rpartition("/")[2].strip().lower()
+    ext = _SUBTYPE_EXT.get(sub)
+    if ext and (ext in _VIDEO_EXTS) == (kind == "video"):
+        return ext
+    return "mp4" if kind == "video" else "jpg"
+
+
+# "image" | "video", stored on each item at ingest; computed for selections
+# saved before the field existed
+def item_kind(item: dict) -> str:
+    return item.get("kind") or ("video" if is_video_mime(item.get("mimeType")) else "image")
+
+
 def build_media_url(item: dict, kind: str, w: int = 800, h: int = 480) -> str:
+    tmpl, sized = _URL_TMPL.get(item.get("baseUrl")) or _url_template(item)
+    if not sized:
+        return tmpl
+    if kind == "video":
+        return item["baseUrl"] + "=dv"
+    return tmpl % (w, h)
+
+
+# Per-item URL built once at load: (url, False) for videos, or a
+# ("<base>=w%d-h%d[-c]", True) template that only needs the size filled in
+def _url_template(item: dict) -> tuple[str, bool]:
     base = item.get("baseUrl") or ""
-    mt = (item.get("mimeType") or "").lower()
     if not base:
-        return ""
-    if kind == "video" or mt.startswith("video/") or "motion" in mt:
-        return base + "=dv"
-    if FORCE_CROP_PARAM:
-        return f"{base}=w{w}-h{h}-c"
-    return f"{base}=w{w}-h{h}"
+        return "", False
+    if item_kind(item) == "video":
+        return base + "=dv", False
+    return base.replace("%", "%%") + ("=w%d-h%d-c" if FORCE_CROP_PARAM else "=w%d-h%d"), True
+
+# Decode HEIC, shrink to the display bound and re-encode as a baseline JPEG.
+# BILINEAR (thumbnail() also pre-reduces by integer factors) instead of LANCZOS,
+# and no optimize/progressive passes: both cost several times the CPU on ARM.
+# The encode goes through libjpeg-turbo directly when PyTurboJPEG is available.
+def heic_to_jpeg(data: bytes, max_size: tuple[int, int]) -> bytes:
+    img = Image.open(io.BytesIO(data))
+    img.thumbnail(max_size, getattr(Image, "Resampling", Image).BILINEAR)
+    rgb = img.convert("RGB")
+    if _tj is not None:
+        return _tj.encode(_np.asarray(rgb), quality=HEIC_JPEG_QUALITY, pixel_format=_TJPF_RGB)
+    buf = io.BytesIO()
+    rgb.save(buf, format="JPEG", quality=HEIC_JPEG_QUALITY, optimize=False, progressive=False)
+    return buf.getvalue()
+
+# Yield an upstream body chunk-wise, straight off the urllib3 response (still
+# decoded) to skip requests' iter_content wrappers on the /content hot path.
+# The connection goes back to the pool even if the client disconnects mid-stream
+# (WSGI closes the generator).
+def iter_upstream(r: requests.Response, chunk_size: int = 64 * 1024):
+    try:
+        yield from r.raw.stream(chunk_size, decode_content=True)
+    finally:
+        r.close()
 
 # -------- token persistence & refresh ----------
 def _merge_tokens(new_tok: dict, old_tok: dict) -> dict:
@@ -153,27 +479,17 @@ def _merge_tokens(new_tok: dict, old_tok: dict) -> dict:
 
 
 def save_tokens(tok: dict) -> None:
-    old = {}
-    if os.path.exists(TOKENS_STORE):
-        try:
-            with open(TOKENS_STORE, "r", encoding="utf-8") as f:
-                old = json.load(f)
-        except Exception:
-            app.logger.exception("Failed to read tokens.json during save")
-    data = _merge_tokens(tok, old)
+    data = _merge_tokens(tok, load_tokens())
     try:
-        with open(TOKENS_STORE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        _store_json(TOKENS_STORE, data, orjson.OPT_INDENT_2, mode=0o600)  # holds the refresh token
         app.logger.info("Persisted tokens.json (has_refresh=%s)", bool(data.get("refresh_token")))
     except Exception:
         app.logger.exception("Failed to persist tokens.json")
 
 
 def load_tokens() -> dict:
-    if not os.path.exists(TOKENS_STORE): return {}
     try:
-        with open(TOKENS_STORE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_json(TOKENS_STORE, {})
     except Exception:
         app.logger.exception("Failed to read tokens.json")
         return {}
@@ -189,7 +505,7 @@ def refresh_access_token(refresh_token: str) -> str | None:
         "grant_type": "refresh_token",
     }
     try:
-        r = requests.post(TOKEN_URL, data=data, timeout=20)
+        r = SESSION.post(TOKEN_URL, data=data, timeout=20)
         if r.status_code != 200:
             app.logger.error("Refresh token failed: %s %s", r.status_code, r.text)
             return None
@@ -201,97 +517,370 @@ def refresh_access_token(refresh_token: str) -> str | None:
         return None
 
 
+def _token_ttl(t: dict) -> float:
+    saved_at = t.get("saved_at") or 0
+    expires_in = t.get("expires_in") or 3600
+    return saved_at + expires_in - time.time()
+
+
+_refresh_lock = threading.Lock()
+
+
+def _refresh_server_token(min_ttl: float, rejected: str | None = None) -> str | None:
+    # Only one thread refreshes; the others wait and reuse its result. With
+    # `rejected` (a token Google just answered 401 to) the TTL is moot: refresh
+    # only if tokens.json still holds that token, else a peer already replaced it.
+    if not _refresh_lock.acquire(timeout=10):
+        return load_tokens().get("access_token")
+    try:
+        t = load_tokens()  # a peer may have refreshed while we waited
+        at = t.get("access_token")
+        if at and (at != rejected if rejected else _token_ttl(t) > min_ttl):
+            return at
+        new_at = refresh_access_token(t.get("refresh_token"))
+        return new_at or at
+    finally:
+        _refresh_lock.release()
+
+
 def get_server_access_token() -> str | None:
     t = load_tokens()
-    rt = t.get("refresh_token")
     at = t.get("access_token")
-    if rt:
-        new_at = refresh_access_token(rt)
-        if new_at:
-            return new_at
+    if at and _token_ttl(t) > 60:
+        return at
+    if t.get("refresh_token"):
+        return _refresh_server_token(60)
     return at
 
+
+def _token_refresher_loop(interval: int = 60, margin: int = TOKEN_REFRESH_MARGIN_SEC) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            t = load_tokens()
+            if t.get("refresh_token") and _token_ttl(t) < margin:
+                _refresh_server_token(margin)
+        except Exception:
+            app.logger.exception("Background token refresh failed")
+
+
+def start_token_refresher() -> None:
+    threading.Thread(target=_token_refresher_loop, name="token-refresher", daemon=True).start()
+
+# -------------------------- per-client server-side state --------------------------
+# Tokens and picker state live in memory keyed by a small opaque cookie, instead of
+# being signed and shipped back in the Flask session cookie on every response.
+# (The Flask session is still used for flash messages.)
+CLIENT_COOKIE = "gps_cid"
+_CLIENT_STATE: dict[str, dict] = {}
+
+
+def client_state() -> dict:
+    if "client_state" not in g:
+        cid = request.cookies.get(CLIENT_COOKIE)
+        st = _CLIENT_STATE.get(cid) if cid else None
+        g.client_id = cid or uuid.uuid4().hex
+        g.client_state = st if st is not None else {}
+    return g.client_state
+
+
+@app.after_request
+def _persist_client_state(resp):
+    st = g.get("client_state")
+    if st:  # only remember clients that actually hold state (not every kiosk <img> hit)
+        _CLIENT_STATE[g.client_id] = st
+        if request.cookies.get(CLIENT_COOKIE) != g.client_id:
+            resp.set_cookie(CLIENT_COOKIE, g.client_id, max_age=365 * 24 * 3600, httponly=True, samesite="Lax")
+    elif st is not None:
+        _CLIENT_STATE.pop(g.client_id, None)
+    return resp
+
+@app.after_request
+def _gzip_response(resp):
+    if resp.mimetype not in GZIP_MIMETYPES:
+        return resp
+    resp.vary.add("Accept-Encoding")
+    if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+            or "Content-Encoding" in resp.headers
+            or "gzip" not in request.accept_encodings):
+        return resp
+    body = resp.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return resp
+    resp.set_data(gzip.compress(body, compresslevel=6))
+    resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
 # -------------------------- client session token helpers --------------------------
 def get_client_access_token() -> str | None:
-    at = session.get("access_token")
-    rt = session.get("refresh_token")
-    saved_at = session.get("token_saved_at") or 0
-    expires_in = session.get("token_expires_in") or 0
-    now = int(time.time())
-
-    should_refresh = bool(rt) and (
-        (not at) or (expires_in and saved_at and (saved_at + expires_in - 60) <= now)
-    )
-
-    if should_refresh:
-        new_at = refresh_access_token(rt)
+    state = client_state()
+    at = state.get("access_token")
+    # token_refresh_epoch (expiry minus 60s) is stamped when the token is stored,
+    # 0 when the lifetime is unknown
+    if state.get("refresh_token") and (
+        (not at) or 0 < state.get("token_refresh_epoch", 0) <= time.time()
+    ):
+        new_at = _refresh_client_token(state)
         if new_at:
-            session["access_token"] = new_at
-            t = load_tokens()
-            session["token_expires_in"] = t.get("expires_in") or session.get("token_expires_in") or 0
-            session["token_saved_at"] = t.get("saved_at") or now
             return new_at
 
-    return session.get("access_token")
+    return state.get("access_token")
+
+
+def _refresh_client_token(state: dict) -> str | None:
+    # Also restamps the expiry so the proactive check above doesn't refresh again
+    new_at = refresh_access_token(state.get("refresh_token"))
+    if new_at:
+        _store_client_token(state, new_at)
+    return new_at
+
+
+# Adopt a freshly refreshed token; the expiry comes from the tokens.json entry the
+# refresh just wrote
+def _store_client_token(state: dict, new_at: str) -> None:
+    state["access_token"] = new_at
+    t = load_tokens()
+    expires_in = t.get("expires_in") or state.get("token_expires_in") or 0
+    state["token_expires_in"] = expires_in
+    state["token_refresh_epoch"] = (t.get("saved_at") or int(time.time())) + expires_in - 60 if expires_in else 0
+
+# -------------------------- HTTP wrappers with 401 retry --------------------------
+# The token is refreshed proactively before expiry, so only a 401 (revoked/expired
+# early) is worth one refresh + retry. A 403 is a scope/permission error that a
+# new token won't fix, and a refresh that hands back the same token isn't retried.
+def _retry_token(r: requests.Response, state: dict, at: str) -> str | None:
+    if r.status_code != 401:
+        return None
+    new_at = _refresh_client_token(state)
+    return new_at if new_at and new_at != at else None
+
 
-# -------------------------- HTTP wrappers with 401/403 retry --------------------------
 def picker_get(url: str) -> requests.Response:
+    state = client_state()
     at = get_client_access_token()
     if not at:
         raise requests.HTTPError("No access token")
     headers = {"Authorization": f"Bearer {at}"}
-    r = requests.get(url, headers=headers, timeout=20)
-    if r.status_code in (401, 403):
-        new_at = refresh_access_token(session.get("refresh_token"))
-        if new_at:
-            session["access_token"] = new_at
-            headers = {"Authorization": f"Bearer {new_at}"}
-            r = requests.get(url, headers=headers, timeout=20)
+    r = SESSION.get(url, headers=headers, timeout=20)
+    new_at = _retry_token(r, state, at)
+    if new_at:
+        headers = {"Authorization": f"Bearer {new_at}"}
+        r = SESSION.get(url, headers=headers, timeout=20)
     r.raise_for_status()
     return r
 
 
 def picker_post(url: str, payload: dict) -> requests.Response:
+    state = client_state()
     at = get_client_access_token()
     if not at:
         raise requests.HTTPError("No access token")
     headers = {"Authorization": f"Bearer {at}"}
-    r = requests.post(url, headers=headers, json=payload, timeout=20)
-    if r.status_code in (401, 403):
-        new_at = refresh_access_token(session.get("refresh_token"))
-        if new_at:
-            session["access_token"] = new_at
-            headers = {"Authorization": f"Bearer {new_at}"}
-            r = requests.post(url, headers=headers, json=payload, timeout=20)
+    r = SESSION.post(url, headers=headers, json=payload, timeout=20)
+    new_at = _retry_token(r, state, at)
+    if new_at:
+        headers = {"Authorization": f"Bearer {new_at}"}
+        r = SESSION.post(url, headers=headers, json=payload, timeout=20)
     r.raise_for_status()
     return r
 
 # -------------------------- session auto-renew helpers --------------------------
 def _iso_to_epoch(iso_ts: str) -> float:
     if not iso_ts: return 0.0
+    # Picker always sends UTC "YYYY-MM-DDTHH:MM:SS[.fff...]Z"; slice it directly
+    # and only fall back to fromisoformat for anything else (e.g. an offset)
+    if len(iso_ts) >= 20 and iso_ts[-1] == "Z" and iso_ts[10] == "T":
+        try:
+            secs = calendar.timegm((int(iso_ts[0:4]), int(iso_ts[5:7]), int(iso_ts[8:10]),
+                                    int(iso_ts[11:13]), int(iso_ts[14:16]), int(iso_ts[17:19]), 0, 0, 0))
+            frac = iso_ts[19:-1]
+            return secs + (float(frac) if frac.startswith(".") and len(frac) > 1 else 0.0)
+        except ValueError:
+            pass
     return datetime.fromisoformat(iso_ts.replace("Z", "+00:00")).timestamp()
 
 
-def _is_expired_or_close(expire_iso: str, buffer_seconds: int = SESSION_RENEW_BUFFER_SEC) -> bool:
-    if not expire_iso: return True
-    now = time.time()
-    exp = _iso_to_epoch(expire_iso)
-    return exp <= (now + buffer_seconds)
+# The epoch is parsed once when expireTime is stored; checks are then a float compare
+def _set_picker_expiry(state: dict, expire_iso: str | None) -> None:
+    if expire_iso and expire_iso != state.get("picker_expire_time"):
+        state["picker_expire_time"] = expire_iso
+        state["picker_expire_epoch"] = _iso_to_epoch(expire_iso)
 
 
 def _ensure_session(picking_config: dict | None = None) -> dict:
-    sid = session.get("picker_session_id")
-    exp = session.get("picker_expire_time")
-    if (not sid) or _is_expired_or_close(exp):
+    state = client_state()
+    sid = state.get("picker_session_id")
+    exp = state.get("picker_expire_time")
+    if (not sid) or (state.get("picker_expire_epoch") or 0.0) <= time.time() + SESSION_RENEW_BUFFER_SEC:
         url = f"{PICKER_BASE}/sessions"
         r = picker_post(url, picking_config or {})
         data = r.json()
-        session["picker_session_id"] = data.get("id")
-        session["picker_uri"] = data.get("pickerUri")
-        session["picker_expire_time"] = data.get("expireTime")
-        app.logger.info("Created/renewed session id=%s exp=%s", session["picker_session_id"], session["picker_expire_time"]) 
+        state["picker_session_id"] = data.get("id")
+        state["picker_uri"] = data.get("pickerUri")
+        _set_picker_expiry(state, data.get("expireTime"))
+        app.logger.info("Created/renewed session id=%s exp=%s", state["picker_session_id"], state.get("picker_expire_time")) 
         return data
-    return {"id": sid, "pickerUri": session.get("picker_uri"), "expireTime": exp}
+    return {"id": sid, "pickerUri": state.get("picker_uri"), "expireTime": exp}
+
+
+# -------------------------- proxy disk cache --------------------------
+# Each cached rendition is <key>.bin plus a <key>.mime sidecar with its Content-Type.
+def proxy_cache_paths(key: str) -> tuple[str, str]:
+    base = os.path.join(PROXY_CACHE_DIR, key)
+    return base + ".bin", base + ".mime"
+
+
+def proxy_cache_lookup(key: str) -> tuple[str, str] | None:
+    path, mime_path = proxy_cache_paths(key)
+    try:
+        if time.time() - os.stat(path).st_mtime > PROXY_CACHE_TTL_SEC:
+            return None
+        with open(mime_path, "r", encoding="utf-8") as f:
+            return path, f.read().strip() or "application/octet-stream"
+    except FileNotFoundError:
+        return None
+
+
+def proxy_cache_store(key: str, data: bytes, mime: str) -> None:
+    os.makedirs(PROXY_CACHE_DIR, exist_ok=True)
+    path, mime_path = proxy_cache_paths(key)
+    write_file_atomic(mime_path, mime.encode("utf-8"))
+    write_file_atomic(path, data)
+    evict_proxy_cache()
+
+
+def proxy_cache_tee(r: requests.Response, key: str, mime: str, chunk_size: int = 64 * 1024):
+    # Stream upstream to the client while spooling it to disk; only a complete
+    # body is committed (a client disconnect discards the partial temp file).
+    os.makedirs(PROXY_CACHE_DIR, exist_ok=True)
+    path, mime_path = proxy_cache_paths(key)
+    fd, tmp = tempfile.mkstemp(dir=PROXY_CACHE_DIR, prefix=".tmp-")
+    complete = False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), FILE_MODE)
+            for chunk in r.raw.stream(chunk_size, decode_content=True):
+                f.write(chunk)
+                yield chunk
+        complete = True
+    finally:
+        r.close()
+        try:
+            if complete:
+                write_file_atomic(mime_path, mime.encode("utf-8"))
+                os.replace(tmp, path)
+                evict_proxy_cache()
+            else:
+                os.unlink(tmp)
+        except OSError:
+            app.logger.exception("Proxy cache commit failed for %s", key)
+
+
+# Request collapsing: the first miss for a key fetches upstream, concurrent misses
+# wait for it to land in the disk cache and are served from there
+_inflight: dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+
+def proxy_fetch_begin(key: str, wait: bool = True) -> bool:
+    # True if the caller owns the fetch (and must call proxy_fetch_end)
+    with _inflight_lock:
+        ev = _inflight.get(key)
+        if ev is None:
+            _inflight[key] = threading.Event()
+            return True
+    if wait:
+        ev.wait(PROXY_COLLAPSE_WAIT_SEC)
+    return False
+
+
+def proxy_fetch_end(key: str) -> None:
+    with _inflight_lock:
+        ev = _inflight.pop(key, None)
+    if ev is not None:
+        ev.set()
+
+
+# Videos are always fetched as "=dv" whatever the viewport, so w/h stay out of their key
+def content_rendition(item: dict, kind: str, w: int, h: int) -> str:
+    if kind == "video":
+        return f"{item.get('id') or item['baseUrl']}:video"
+    return f"{item.get('id') or item['baseUrl']}:{kind}:{w}:{h}"
+
+
+def proxy_cache_key(rendition: str) -> str:
+    return hashlib.sha1(rendition.encode()).hexdigest()
+
+
+# Slideshow read-ahead: the screensaver walks items in order, so the next few
+# images are fetched into the disk cache while the current one is on screen
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+def _warm(item: dict, key: str, w: int, h: int, token: str) -> None:
+    if proxy_cache_lookup(key) or not proxy_fetch_begin(key, wait=False):
+        return
+    try:
+        url = build_media_url(item, "image", w=w, h=h)
+        r = SESSION.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=MEDIA_FETCH_TIMEOUT, stream=True)
+        mime = r.headers.get("Content-Type", "application/octet-stream")
+        if r.status_code != 200:
+            r.close()
+            return
+        if "heic" in mime.lower() or "heif" in mime.lower():
+            # Convert here, off the request path, so /content finds the JPEG cached
+            data = r.content
+            r.close()
+            if _ensure_heif():
+                proxy_cache_store(key, heic_to_jpeg(data, (w, h)), "image/jpeg")
+            return
+        for _ in proxy_cache_tee(r, key, mime):
+            pass
+    except Exception:
+        app.logger.exception("Prefetch failed for %s", key)
+    finally:
+        proxy_fetch_end(key)
+
+
+def prefetch_next(items: list, index: int, w: int, h: int, token_fn) -> None:
+    todo = []
+    for i in range(1, min(PREFETCH_AHEAD, len(items) - 1) + 1):
+        item = items[(index + i) % len(items)]
+        if not item.get("baseUrl") or item_kind(item) == "video":
+            continue
+        key = proxy_cache_key(content_rendition(item, "image", w, h))
+        if key not in _inflight and not proxy_cache_lookup(key):
+            todo.append((item, key))
+    if not todo:
+        return
+    token = token_fn()  # only resolved when there is something to fetch
+    if token:
+        for item, key in todo:
+            _prefetch_pool.submit(_warm, item, key, w, h, token)
+
+
+def evict_proxy_cache() -> None:
+    # Drop expired entries, then the oldest ones until we're under the size cap
+    now = time.time()
+    entries, total = [], 0
+    try:
+        with os.scandir(PROXY_CACHE_DIR) as it:
+            for de in it:
+                if not de.name.endswith(".bin"):
+                    continue
+                st = de.stat()
+                entries.append((st.st_mtime, st.st_size, de.name[:-4]))
+                total += st.st_size
+    except FileNotFoundError:
+        return
+    entries.sort()
+    for mtime, size, key in entries:
+        if total <= PROXY_CACHE_MAX_BYTES and now - mtime <= PROXY_CACHE_TTL_SEC:
+            break
+        for p in proxy_cache_paths(key):
+            try: os.unlink(p)
+            except FileNotFoundError: pass
+        total -= size
 
 
 @app.errorhandler(Exception)
@@ -355,14 +944,26 @@ async function poll(){
     const j = await r.json();
     if (j.renewed) { location.reload(); return; }
     if(j.ready){ window.location='/fetch-selected'; return; }
-    const interval = (j.interval && typeof j.interval==='number')? j.interval : 5.0;
+    // 0 after a long-poll timeout: the server already waited, reconnect immediately
+    const interval = (typeof j.interval==='number')? j.interval : 5.0;
     setTimeout(poll, interval*1000);
   }catch(e){
     document.getElementById('debug').textContent='Polling error: '+e;
     setTimeout(poll, 5000);
   }
 }
-poll();
+// Prefer a single server-sent events stream; fall back to polling if the
+// browser lacks EventSource or the server refuses the stream (204/503)
+function listen(){
+  if(!window.EventSource){ poll(); return; }
+  const es = new EventSource('/api/events');
+  const dbg = document.getElementById('debug');
+  es.addEventListener('waiting', ()=>{ dbg.textContent='Waiting… '+new Date().toLocaleTimeString(); });
+  es.addEventListener('ready', ()=>{ es.close(); window.location='/fetch-selected'; });
+  es.addEventListener('renewed', ()=>{ es.close(); location.reload(); });
+  es.onerror = ()=>{ if(es.readyState===EventSource.CLOSED) poll(); };
+}
+listen();
 </script>
 """
 
@@ -404,8 +1005,8 @@ body.idle #yt-controls{opacity:0;pointer-events:none}
 <script>
 document.addEventListener('DOMContentLoaded', async () => {
   const USE_LOCAL   = {{ use_local|tojson }};
-  const LOCAL_ITEMS = {{ local_items|tojson }};   // [{path, kind, filename}]
-  const REMOTE_ITEMS= {{ remote_items|tojson }};  // [{baseUrl,mimeType,filename}]
+  const LOCAL_ITEMS = {{ local_json }};   // [{kind, filename}]
+  const REMOTE      = {{ remote_json }};  // {kind:[...], src:[...], name:[...]} parallel arrays
   const INTERVAL    = {{ interval_seconds }} * 1000;
   const REFRESH_MS  = {{ refresh_minutes }} * 60 * 1000;
   const stage = document.querySelector('.stage');
@@ -422,8 +1023,7 @@ document.addEventListener('DOMContentLoaded', async () => {
 
   function viewWH(){ return { w: Math.max(1, Math.round(window.innerWidth || 800)), h: Math.max(1, Math.round(window.innerHeight || 480))}; }
 
-  function isVideoRemote(it){ const mt=(it.mimeType||'').toLowerCase(); return mt.startswith('video/') || mt.includes('motion'); }
-  function remoteUrlFor(it, kind){ const {w,h}=viewWH(); const idx=REMOTE_ITEMS.indexOf(it); const q=new URLSearchParams({kind,w:String(w),h:String(h)}); return '/content/'+idx+'?'+q.toString(); }
+  const WH_QS = (({w,h}) => '&w='+w+'&h='+h)(viewWH());   // viewport is fixed for the page's lifetime
 
   let idx = 0;
   async function showLocal(i){
@@ -442,30 +1042,30 @@ document.addEventListener('DOMContentLoaded', async () => {
   }
 
   async function showRemote(i){
-    const it = REMOTE_ITEMS[i]; if(!it) return;
-    stage.innerHTML=''; let el, kind = isVideoRemote(it) ? 'video' : 'image'; const url = remoteUrlFor(it, kind);
-    const onError = async () => { const fb = remoteUrlFor(it,'image'); const img=document.createElement('img'); img.src=fb; img.alt=it.filename||''; img.addEventListener('error',()=>logMsg('Fallback image error: '+fb)); img.addEventListener('load',()=>logMsg('Fallback image loaded: '+(it.filename||''))); stage.innerHTML=''; stage.appendChild(img); };
+    if(i >= REMOTE.src.length) return; const name = REMOTE.name[i]||'';
+    stage.innerHTML=''; let el, kind = REMOTE.kind[i]; const url = REMOTE.src[i] + WH_QS;
+    const onError = async () => { const fb = '/content/'+i+'?kind=image' + WH_QS; const img=document.createElement('img'); img.src=fb; img.alt=name; img.addEventListener('error',()=>logMsg('Fallback image error: '+fb)); img.addEventListener('load',()=>logMsg('Fallback image loaded: '+name)); stage.innerHTML=''; stage.appendChild(img); };
     if (kind==='video'){
       el=document.createElement('video'); el.src=url; el.autoplay=true; el.loop=true; el.muted=true; el.playsInline=true;
       el.addEventListener('error', async ()=>{ logMsg('Video error: '+url); await onError(); });
-      el.addEventListener('loadeddata', ()=> logMsg('Playing video '+(it.filename||'')) );
+      el.addEventListener('loadeddata', ()=> logMsg('Playing video '+name) );
     } else {
-      el=document.createElement('img'); el.src=url; el.alt=it.filename||'';
+      el=document.createElement('img'); el.src=url; el.alt=name;
       el.addEventListener('error', async ()=>{ logMsg('Image error: '+url); await onError(); });
-      el.addEventListener('load', ()=> logMsg('Showing image '+(it.filename||'')) );
+      el.addEventListener('load', ()=> logMsg('Showing image '+name) );
     }
     el.className='fade'; stage.appendChild(el);
   }
 
-  const items = USE_LOCAL ? LOCAL_ITEMS : REMOTE_ITEMS;
-  if(!items || !items.length){
+  const count = USE_LOCAL ? LOCAL_ITEMS.length : REMOTE.src.length;
+  if(!count){
     stage.innerHTML='<div class="empty">No items found. Pick & download first.</div>';
     logMsg('No ITEMS'); return;
   }
 
   async function show(i){ if (USE_LOCAL) return showLocal(i); else return showRemote(i); }
   await show(idx);
-  setInterval(async () => { idx=(idx+1)%items.length; await show(idx); }, INTERVAL);
+  setInterval(async () => { idx=(idx+1)%count; await show(idx); }, INTERVAL);
   if(!USE_LOCAL && REFRESH_MS>0) setInterval(()=>{ logMsg('Refreshing to renew baseUrl…'); location.reload(); }, REFRESH_MS);
 });
 </script>
@@ -516,34 +1116,29 @@ document.addEventListener('DOMContentLoaded', async () => {
   }
   function disarmWatchdog() { clearTimeout(watchdogT); watchdogT = null; }
 
-  // Title polling
-  let labelPollT = null;
+  // Now-playing label: refreshed from player state changes, memoized per video id
+  const V_RE = /[?&]v=([^&]+)/;
+  let labelId = null;
   function fallbackLabel() {
     try {
       if (YT_PLAYLIST_ID && typeof ytPlayer.getPlaylistIndex === 'function') {
         const idx = ytPlayer.getPlaylistIndex();
         return (idx != null && idx >= 0) ? `Track ${idx+1}` : 'Now playing…';
       }
-      const url = ytPlayer.getVideoUrl();
-      const m = /[?&]v=([^&]+)/.exec(url);
+      const m = V_RE.exec(ytPlayer.getVideoUrl());
       return m ? `Video ${m[1]}` : 'Now playing…';
     } catch { return 'Now playing…'; }
   }
   function updateLabel() {
     try {
       const d = ytPlayer.getVideoData();
+      const id = d && d.video_id;
+      if (id && id === labelId) return;  // already showing this video's title
       const title = (d && d.title) ? d.title.trim() : '';
       $label.textContent = title || fallbackLabel();
+      labelId = title ? id : null;        // keep retrying until the title shows up
     } catch { $label.textContent = fallbackLabel(); }
   }
-  function startLabelPoll() {
-    clearInterval(labelPollT);
-    let ticks = 0;
-    labelPollT = setInterval(() => {
-      updateLabel();
-      if (++ticks >= 10) clearInterval(labelPollT);
-    }, 1500);
-  }
 
   function restartFromBeginning() {
     try {
@@ -594,7 +1189,7 @@ document.addEventListener('DOMContentLoaded', async () => {
       setMuteUI(false);
       ytPlayer.playVideo();
       armWatchdog();
-      updateLabel(); startLabelPoll();
+      updateLabel();
       setPlayingUI(true);
       bumpActivity();
     } catch(e) { console.warn('[YT] onReady error:', e); }
@@ -604,8 +1199,8 @@ document.addEventListener('DOMContentLoaded', async () => {
     const st = e.data;
     const playing = st === YT.PlayerState.PLAYING;
     setPlayingUI(playing);
+    updateLabel();
     if (st === YT.PlayerState.PLAYING) {
-      updateLabel(); startLabelPoll();
       disarmWatchdog(); armWatchdog();
     } else if (st === YT.PlayerState.ENDED) {
       restartFromBeginning(); armWatchdog();
@@ -695,6 +1290,12 @@ a.link{color:#7fc7ff}
 <pre>Remote items: {{ remote_items[:5]|tojson(indent=2) }}</pre>
 """
 
+# Compiled once at import; render_template() accepts Template objects directly
+_TPL_PICK = app.jinja_env.from_string(PICK_TEMPLATE)
+_TPL_STATUS = app.jinja_env.from_string(STATUS_TEMPLATE)
+_TPL_SCREENSAVER = app.jinja_env.from_string(SCREENSAVER_TEMPLATE)
+_TPL_DIAG = app.jinja_env.from_string(DIAG_TEMPLATE)
+
 # -------------------------- routes --------------------------
 @app.route("/")
 def home():
@@ -702,23 +1303,26 @@ def home():
 
 @app.route("/pick")
 def pick():
-    return render_template_string(PICK_TEMPLATE)
+    return render_template(_TPL_PICK)
 
 # ---- OAuth start/callback ----
+# Everything in the consent URL is fixed by env config, so build it once
+_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth?" + urlencode({
+    "client_id": CLIENT_ID,
+    "redirect_uri": REDIRECT_URI,
+    "response_type": "code",
+    "access_type": "offline",
+    "prompt": "consent",
+    "scope": SCOPE,
+})
+
 @app.route("/auth/start")
 def auth_start():
-    params = {
-        "client_id": CLIENT_ID,
-        "redirect_uri": REDIRECT_URI,
-        "response_type": "code",
-        "access_type": "offline",
-        "prompt": "consent",
-        "scope": SCOPE,
-    }
-    return redirect("https://accounts.google.com/o/oauth2/v2/auth?" + urlencode(params))
+    return redirect(_AUTH_URL)
 
 @app.route("/auth/callback")
 def auth_callback():
+    state = client_state()
     code = request.args.get("code")
     if not code:
         flash("Authorization failed: missing code.")
@@ -732,7 +1336,7 @@ def auth_callback():
         "grant_type": "authorization_code",
     }
     try:
-        r = requests.post(TOKEN_URL, data=data, timeout=20)
+        r = SESSION.post(TOKEN_URL, data=data, timeout=20)
         if r.status_code != 200:
             app.logger.error("Token exchange failed: %s %s", r.status_code, r.text)
             flash("Authorization failed (token exchange). Check client/secret/redirect URI.")
@@ -743,13 +1347,13 @@ def auth_callback():
         flash("Authorization failed due to a network error.")
         return redirect(url_for("pick"))
 
-    session["access_token"] = tok.get("access_token")
-    session["refresh_token"] = tok.get("refresh_token")
-    session["token_type"] = tok.get("token_type", "Bearer")
-    session["token_expires_in"] = tok.get("expires_in") or 0
-    session["token_saved_at"] = int(time.time())
+    state["access_token"] = tok.get("access_token")
+    state["refresh_token"] = tok.get("refresh_token")
+    state["token_type"] = tok.get("token_type", "Bearer")
+    state["token_expires_in"] = tok.get("expires_in") or 0
+    state["token_refresh_epoch"] = int(time.time()) + state["token_expires_in"] - 60 if state["token_expires_in"] else 0
 
-    if not session["access_token"]:
+    if not state["access_token"]:
         flash("Authorization failed: no access token returned.")
         return redirect(url_for("pick"))
 
@@ -759,6 +1363,7 @@ def auth_callback():
 # ---- Picker session lifecycle ----
 @app.route("/create-session", methods=["GET", "POST"])
 def create_session():
+    state = client_state()
     access_token = get_client_access_token()
     if not access_token:
         flash("Not authorized. Please start authorization.")
@@ -774,56 +1379,135 @@ def create_session():
     if not (session_id and picker_uri):
         flash("Picker session created but missing data. Try again.")
         return redirect(url_for("pick"))
-    session["picker_session_id"] = session_id
-    session["picker_uri"] = picker_uri
+    state["picker_session_id"] = session_id
+    state["picker_uri"] = picker_uri
     return redirect(url_for("status"))
 
 @app.route("/status")
 def status():
-    picker_uri = session.get("picker_uri")
+    state = client_state()
+    picker_uri = state.get("picker_uri")
     if picker_uri:
         picker_uri = picker_uri.rstrip("/") + "/autoclose"
-    return render_template_string(STATUS_TEMPLATE, picker_uri=picker_uri, session_id=session.get("picker_session_id"), cache_dir=CACHE_DIR)
+    return render_template(_TPL_STATUS, picker_uri=picker_uri, session_id=state.get("picker_session_id"), cache_dir=CACHE_DIR)
+
+def _poll_reply(payload: dict, session_id: str | None) -> Response:
+    # ETag over session + body: a poll whose answer hasn't changed gets an empty 304
+    body = orjson.dumps(payload)
+    etag = hashlib.blake2b(f"{session_id}:".encode() + body, digest_size=8).hexdigest()
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, status=200, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+_poll_slots = threading.BoundedSemaphore(max(1, POLL_MAX_INFLIGHT))
 
 @app.route("/api/poll")
 def api_poll():
+    state = client_state()
     access_token = get_client_access_token()
-    session_id = session.get("picker_session_id")
+    session_id = state.get("picker_session_id")
     if not (access_token and session_id):
-        return jsonify({"ready": False, "interval": 5.0, "error": "no_session"}), 200
+        return _poll_reply({"ready": False, "interval": 5.0, "error": "no_session"}, session_id)
     status_url = f"{PICKER_BASE}/sessions/{session_id}"
-    renewed = False
+    # Long-poll: hold the request and re-check Google every pollInterval until the
+    # selection is done or POLL_HOLD_SECONDS pass; the client re-polls right away.
+    # Without a free slot we check once and return so worker threads aren't exhausted.
+    held = _poll_slots.acquire(blocking=False)
+    deadline = time.monotonic() + (POLL_HOLD_SECONDS if held else 0)
     try:
-        if _is_expired_or_close(session.get("picker_expire_time"), buffer_seconds=30):
-            _ensure_session()
-            session_id = session.get("picker_session_id")
-            status_url = f"{PICKER_BASE}/sessions/{session_id}"
-            renewed = True
-        r = picker_get(status_url)
-        info = r.json()
-        if info.get("expireTime"):
-            session["picker_expire_time"] = info.get("expireTime")
-        if info.get("mediaItemsSet"):
-            return jsonify({"ready": True, "interval": 0, "renewed": renewed}), 200
-        poll_cfg = info.get("pollingConfig", {})
-        interval = parse_seconds(poll_cfg.get("pollInterval"), default=5.0)
-        return jsonify({"ready": False, "interval": interval, "renewed": renewed}), 200
+        while True:
+            if (state.get("picker_expire_epoch") or 0.0) <= time.time() + 30:
+                _ensure_session()
+                return _poll_reply({"ready": False, "interval": 0, "renewed": True}, session_id)
+            r = picker_get(status_url)
+            info = r.json()
+            _set_picker_expiry(state, info.get("expireTime"))
+            if info.get("mediaItemsSet"):
+                return _poll_reply({"ready": True, "interval": 0, "renewed": False}, session_id)
+            poll_cfg = info.get("pollingConfig", {})
+            interval = parse_seconds(poll_cfg.get("pollInterval"), default=5.0)
+            remaining = deadline - time.monotonic()
+            if remaining <= interval:
+                # Unheld polls keep the client's timer so a full house doesn't spin
+                return _poll_reply({"ready": False, "interval": 0 if held else interval, "renewed": False}, session_id)
+            time.sleep(interval)
     except Exception:
         app.logger.exception("Poll exception")
-        return jsonify({"ready": False, "interval": 5.0, "error": "exception"}), 200
+        return _poll_reply({"ready": False, "interval": 5.0, "error": "exception"}, session_id)
+    finally:
+        if held:
+            _poll_slots.release()
+
+# Server-sent events: one connection per status page instead of a poll ladder.
+# Emits "waiting" after every Picker check, then "ready" or "renewed" and ends.
+@app.route("/api/events")
+def api_events():
+    state = client_state()
+    session_id = state.get("picker_session_id")
+    if not (get_client_access_token() and session_id):
+        return Response(status=204)  # 204 tells EventSource not to reconnect
+    if not _poll_slots.acquire(blocking=False):
+        return Response(status=503)  # the page falls back to /api/poll
+    status_url = f"{PICKER_BASE}/sessions/{session_id}"
+
+    def events():
+        deadline = time.monotonic() + SSE_MAX_SECONDS
+        delay = 0.0
+        yield "retry: 3000\n\n"
+        try:
+            while time.monotonic() < deadline:
+                if (state.get("picker_expire_epoch") or 0.0) <= time.time() + 30:
+                    _ensure_session()
+                    yield "event: renewed\ndata: {}\n\n"
+                    return
+                info = picker_get(status_url).json()
+                _set_picker_expiry(state, info.get("expireTime"))
+                if info.get("mediaItemsSet"):
+                    yield "event: ready\ndata: {}\n\n"
+                    return
+                yield "event: waiting\ndata: {}\n\n"  # doubles as keep-alive
+                poll_cfg = info.get("pollingConfig", {})
+                floor = parse_seconds(poll_cfg.get("pollInterval"), default=5.0)
+                delay = max(floor, min(delay * 1.5, SSE_POLL_MAX_SEC))
+                # Wake in time for the session renewal check and the stream deadline
+                wake = min(deadline, time.monotonic() + delay)
+                exp = state.get("picker_expire_epoch")
+                if exp:
+                    wake = min(wake, time.monotonic() + max(1.0, exp - 30 - time.time()))
+                time.sleep(max(0.0, wake - time.monotonic()))
+        except Exception:
+            app.logger.exception("Events stream exception")
+
+    resp = Response(stream_with_context(events()), mimetype="text/event-stream")
+    resp.call_on_close(_poll_slots.release)  # also runs if the client never read a byte
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
 
 @app.route("/fetch-selected")
 def fetch_selected():
+    state = client_state()
     access_token = get_client_access_token()
-    session_id = session.get("picker_session_id")
+    session_id = state.get("picker_session_id")
     if not (access_token and session_id):
         flash("No active Picker session. Create session first.")
         return redirect(url_for("create_session"))
 
     items_url = f"{PICKER_BASE}/mediaItems"
     all_items, page_token = [], None
+    deadline = time.monotonic() + FETCH_PAGES_DEADLINE_SEC
     try:
         while True:
+            if time.monotonic() >= deadline:
+                # Nothing is saved and the Picker session is kept, so a retry gets everything
+                app.logger.warning("Fetch selected: page deadline hit after %d items", len(all_items))
+                flash(f"Listing the selection timed out after {len(all_items)} items; nothing was saved. "
+                      "Open Status to try again.")
+                return redirect(url_for("pick"))
             params = {"sessionId": session_id, "pageSize": 100}
             if page_token: params["pageToken"] = page_token
             url = items_url + "?" + urlencode(params)
@@ -837,14 +1521,16 @@ def fetch_selected():
         flash("Network error fetching selected items.")
         return redirect(url_for("status"))
 
-    simplified = []
-    for m in all_items:
-        mf = m.get("mediaFile") or {}
-        base = mf.get("baseUrl") or m.get("baseUrl")
-        mime = mf.get("mimeType", m.get("mimeType", ""))
-        filename = mf.get("filename", m.get("filename", ""))
-        if not base: continue
-        simplified.append({"baseUrl": base, "mimeType": mime, "filename": filename})
+    simplified = [
+        {"id": m.get("id"), "baseUrl": base, "mimeType": mime,
+         "kind": "video" if is_video_mime(mime) else "image",
+         "filename": mf.get("filename", m.get("filename", ""))}
+        for m in all_items
+        for mf in (m.get("mediaFile") or {},)
+        for base in (mf.get("baseUrl") or m.get("baseUrl"),)
+        if base
+        for mime in (mf.get("mimeType", m.get("mimeType", "")),)
+    ]
 
     if len(simplified) == 0:
         flash("No items selected. Pick in Google Photos and press Done.")
@@ -853,107 +1539,132 @@ def fetch_selected():
     save_media_items(simplified)
 
     ensure_cache_dir()
-    local_index = []
-
-    def ext_for_mime(m: str, kind: str) -> str:
-        m = (m or "").lower()
-        if kind == 'video':
-            if 'mp4' in m: return 'mp4'
-            if 'webm' in m: return 'webm'
-            return 'mp4'
-        if 'jpeg' in m or 'jpg' in m: return 'jpg'
-        if 'png' in m: return 'png'
-        if 'gif' in m: return 'gif'
-        if 'webp' in m: return 'webp'
-        if 'heic' in m or 'heif' in m: return 'heic'
-        return 'jpg'
-
-    def is_video_mime(m: str) -> bool:
-        m = (m or "").lower()
-        return m.startswith('video/') or ('motion' in m)
+
+    # Downloads run on worker threads (no request context there), so they share one
+    # token; the first worker to hit a 401 refreshes it and the rest reuse it
+    tok = {"at": get_client_access_token()}
+    tok_lock = threading.Lock()
+    refresh_token = state.get("refresh_token")
 
     def auth_fetch(url: str) -> requests.Response:
-        at = get_client_access_token()
-        headers = {"Authorization": f"Bearer {at}"}
-        r = requests.get(url, headers=headers, timeout=60, stream=True)
-        if r.status_code in (401,403):
-            new_at = refresh_access_token(session.get("refresh_token"))
-            if new_at:
-                session["access_token"] = new_at
-                headers = {"Authorization": f"Bearer {new_at}"}
-                r = requests.get(url, headers=headers, timeout=60, stream=True)
+        at = tok["at"]
+        r = SESSION.get(url, headers={"Authorization": f"Bearer {at}"}, timeout=(5, 60), stream=True)
+        if r.status_code == 401:
+            r.close()
+            with tok_lock:
+                if tok["at"] == at:
+                    tok["at"] = refresh_access_token(refresh_token) or at
+            if tok["at"] != at:
+                r = SESSION.get(url, headers={"Authorization": f"Bearer {tok['at']}"}, timeout=(5, 60), stream=True)
         return r
 
-    downloaded = 0
-    for i, item in enumerate(simplified):
+    # Cache files are named by media id (+ download size for images), so items that
+    # were already downloaded by an earlier pick are reused instead of fetched again
+    previous_index = read_cache_index()
+    previous = {e["key"]: e for e in previous_index if e.get("key")}
+
+    def save_heic(key: str, item: dict, ctype: str, data: bytes) -> dict | None:
+        try:
+            try:
+                data = heic_to_jpeg(data, (DL_WIDTH, DL_HEIGHT))
+                ext = 'jpg'
+            except Exception:
+                app.logger.exception("HEIC→JPEG conversion failed; saving raw")
+                ext = ext_for_mime(ctype, 'image')
+            local_path = os.path.join(CACHE_DIR, f"{key}.{ext}")
+            write_file_atomic(local_path, data)
+            return {"path": local_path, "kind": "image", "mime": _EXT_MIME[ext], "key": key, "filename": item.get('filename')}
+        except Exception:
+            app.logger.exception("Saving converted item %s failed", key)
+            return None
+
+    def download_one(i: int, item: dict) -> dict | Future | None:
         base = item['baseUrl']
-        mime = (item['mimeType'] or '').lower()
-        fname = (item.get('filename') or f"item_{i}").strip().replace('/', '_')
-        kind = 'video' if is_video_mime(mime) else 'image'
+        kind = item_kind(item)
+        rendition = item.get('id') or base
+        if kind != 'video':
+            rendition += f":{DL_WIDTH}x{DL_HEIGHT}"
+        key = hashlib.sha1(rendition.encode()).hexdigest()[:16]
+        prev = previous.get(key)
+        if prev and os.path.exists(prev.get("path") or ""):
+            return dict(prev, filename=item.get('filename'))
+        r = None
         try:
             if kind == 'video':
                 url = base + "=dv"
                 r = auth_fetch(url)
                 if r.status_code != 200:
                     app.logger.error("Video download failed %s: %s", r.status_code, url)
-                    continue
+                    return None
                 ctype = (r.headers.get('Content-Type','') or '').lower()
                 ext = ext_for_mime(ctype, 'video')
-                local_path = os.path.join(CACHE_DIR, f"{i}_{fname}.{ext}")
-                with open(local_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=1024*64):
-                        if chunk: f.write(chunk)
-                local_index.append({"path": local_path, "kind": "video", "filename": item.get('filename')})
-                downloaded += 1
+                local_path = os.path.join(CACHE_DIR, f"{key}.{ext}")
+                write_chunks_atomic(local_path, r.iter_content(chunk_size=DOWNLOAD_CHUNK))
+                return {"path": local_path, "kind": "video", "mime": _EXT_MIME[ext], "key": key, "filename": item.get('filename')}
             else:
-                url = build_media_url(item, 'image', w=DL_WIDTH, h=DL_HEIGHT)
+                url = base + _DL_SUFFIX
                 r = auth_fetch(url)
                 if r.status_code != 200:
                     app.logger.error("Image download failed %s: %s", r.status_code, url)
-                    continue
+                    return None
                 ctype = (r.headers.get('Content-Type','application/octet-stream') or '').lower()
-                data = r.content
-                if ('heic' in ctype or 'heif' in ctype) and HEIF_ENABLED and Image is not None:
-                    try:
-                        img = Image.open(io.BytesIO(data))
-                        buf = io.BytesIO()
-                        img.convert("RGB").save(buf, format="JPEG", quality=90)
-                        data = buf.getvalue()
-                        ext = 'jpg'
-                    except Exception:
-                        app.logger.exception("HEIC→JPEG conversion failed; saving raw")
-                        ext = ext_for_mime(ctype, 'image')
-                else:
+                if not (('heic' in ctype or 'heif' in ctype) and _ensure_heif()):
+                    # Nothing to convert: stream to disk instead of holding the body
                     ext = ext_for_mime(ctype, 'image')
-                local_path = os.path.join(CACHE_DIR, f"{i}_{fname}.{ext}")
-                with open(local_path, 'wb') as f:
-                    f.write(data)
-                local_index.append({"path": local_path, "kind": "image", "filename": item.get('filename')})
-                downloaded += 1
+                    local_path = os.path.join(CACHE_DIR, f"{key}.{ext}")
+                    write_chunks_atomic(local_path, r.iter_content(chunk_size=DOWNLOAD_CHUNK))
+                    return {"path": local_path, "kind": "image", "mime": _EXT_MIME[ext], "key": key, "filename": item.get('filename')}
+                # Decode/encode runs on the transcode pool so this thread moves on
+                # to the next download
+                return transcode_pool.submit(save_heic, key, item, ctype, r.content)
         except Exception:
             app.logger.exception("Download error for item %d", i)
+        finally:
+            if r is not None:
+                r.close()
+        return None
 
-    write_cache_index(local_index)
+    # Network-bound, so threads overlap the per-item latency; results keep pick order.
+    # HEIC conversion is CPU-bound and goes to its own pool sized to the cores
+    # (Pillow and libheif drop the GIL while coding), pipelined behind the fetches.
+    results = [None] * len(simplified)
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="transcode") as transcode_pool:
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download") as pool:
+            futures = {pool.submit(download_one, i, item): i for i, item in enumerate(simplified)}
+            for fut in as_completed(futures):
+                results[futures[fut]] = fut.result()
+    local_index = [entry for entry in (e.result() if isinstance(e, Future) else e for e in results) if entry]
+    downloaded = len(local_index)
+    if tok["at"] != state.get("access_token"):
+        _store_client_token(state, tok["at"])
+
+    # Drop files from the previous pick that this one no longer references, but only
+    # once the new index is on disk (the old one would still point at them)
+    if write_cache_index(local_index):
+        kept = {e["path"] for e in local_index}
+        for e in previous_index:
+            if e.get("path") and e["path"] not in kept:
+                try: os.unlink(e["path"])
+                except OSError: pass
 
     # Optional cleanup: delete session
     try:
         del_url = f"{PICKER_BASE}/sessions/{session_id}"
         at = get_client_access_token()
         headers = {"Authorization": f"Bearer {at}"}
-        dr = requests.delete(del_url, headers=headers, timeout=20)
-        if dr.status_code in (401, 403):
-            new_at = refresh_access_token(session.get("refresh_token"))
-            if new_at:
-                session["access_token"] = new_at
-                headers = {"Authorization": f"Bearer {new_at}"}
-                dr = requests.delete(del_url, headers=headers, timeout=20)
+        dr = SESSION.delete(del_url, headers=headers, timeout=20)
+        new_at = _retry_token(dr, state, at)
+        if new_at:
+            headers = {"Authorization": f"Bearer {new_at}"}
+            dr = SESSION.delete(del_url, headers=headers, timeout=20)
     except Exception:
         app.logger.exception("Session delete failed")
 
     # Clear session identifiers
-    session.pop("picker_session_id", None)
-    session.pop("picker_uri", None)
-    session.pop("picker_expire_time", None)
+    state.pop("picker_session_id", None)
+    state.pop("picker_uri", None)
+    state.pop("picker_expire_time", None)
+    state.pop("picker_expire_epoch", None)
 
     flash(f"Downloaded {downloaded} items to local cache.")
     return redirect(url_for("screensaver"))
@@ -961,75 +1672,151 @@ def fetch_selected():
 # ---- Media proxy + HEIC→JPEG ----
 @app.route("/content/<int:index>")
 def content(index: int):
+    state = client_state()
     items = load_media_items()
     if index < 0 or index >= len(items):
         abort(404)
     item = items[index]
     kind = request.args.get("kind", "image")
-    try:
-        w = int(request.args.get("w", "800"))
-        h = int(request.args.get("h", "480"))
-    except ValueError:
-        w, h = 800, 480
+    w, h = _snap_dims(_safe_int(request.args.get("w"), 800), _safe_int(request.args.get("h"), 480))
 
     url = build_media_url(item, kind, w=w, h=h)
     if not url:
         abort(404)
 
-    access_token = get_client_access_token()
+    # Validators: the ETag is stable per item + rendition and Last-Modified tracks the
+    # selection file, so the looping slideshow revalidates with a bodiless 304
+    rendition = content_rendition(item, kind, w, h)
+    etag = hashlib.blake2b(rendition.encode(), digest_size=8).hexdigest()
+    last_modified = datetime.fromtimestamp(max(_json_mtime_ns(SELECTION_STORE), 0) // 1_000_000_000, tz=timezone.utc)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        resp.last_modified = last_modified
+        resp.headers["Cache-Control"] = CONTENT_CACHE_CONTROL
+        return resp
+
+    def send_cached(cached: tuple[str, str]) -> Response:
+        resp = send_file(cached[0], mimetype=cached[1], conditional=True,
+                         etag=etag, last_modified=last_modified)
+        resp.headers.pop("Content-Disposition", None)  # don't leak the cache file name
+        resp.headers["Cache-Control"] = CONTENT_CACHE_CONTROL
+        return resp
+
     is_local = request.remote_addr in ("127.0.0.1", "::1")
-    if (not access_token) and is_local and DISABLE_SESSION_AUTH_FOR_LOCAL:
-        access_token = get_server_access_token()
+
+    def resolve_token() -> str | None:
+        at = get_client_access_token()
+        if (not at) and is_local and DISABLE_SESSION_AUTH_FOR_LOCAL:
+            at = get_server_access_token()
+        return at
+
+    cache_key = proxy_cache_key(rendition)
+    cached = proxy_cache_lookup(cache_key)
+    if cached:
+        prefetch_next(items, index, w, h, resolve_token)
+        return send_cached(cached)
+
+    access_token = resolve_token()
     if not access_token:
         abort(401)
+    prefetch_next(items, index, w, h, lambda: access_token)
+
+    # Video seeks are passed through to Google as ranged requests and not cached.
+    # An open "bytes=0-" (what players send first) is fetched whole so it can be.
+    byte_range = request.headers.get("Range") if kind == "video" else None
+    if byte_range and byte_range.replace(" ", "") == "bytes=0-":
+        byte_range = None
+
+    # Someone else is already fetching this rendition: wait and serve their copy.
+    # If it didn't make it to disk (error, timeout, uncached HEIC) fetch ourselves.
+    leader = False if byte_range else proxy_fetch_begin(cache_key)
+    if not (leader or byte_range):
+        cached = proxy_cache_lookup(cache_key)
+        if cached:
+            return send_cached(cached)
+
+    def auth_headers(at: str) -> dict:
+        headers = {"Authorization": f"Bearer {at}"}
+        if byte_range:
+            headers["Range"] = byte_range
+        return headers
 
     def authorized_fetch(at: str) -> requests.Response:
-        headers = {"Authorization": f"Bearer {at}"}
-        r = requests.get(url, headers=headers, timeout=30)
+        headers = auth_headers(at)
+        r = SESSION.get(url, headers=headers, timeout=MEDIA_FETCH_TIMEOUT, stream=True)
         if r.status_code in (401, 403):
+            r.close()
             new_at = None
             if is_local and DISABLE_SESSION_AUTH_FOR_LOCAL:
-                t = load_tokens()
-                new_at = refresh_access_token(t.get("refresh_token"))
+                new_at = _refresh_server_token(60, rejected=at)
             else:
-                new_at = refresh_access_token(session.get("refresh_token"))
-                if new_at:
-                    session["access_token"] = new_at
-            if new_at:
-                headers = {"Authorization": f"Bearer {new_at}"}
-                r = requests.get(url, headers=headers, timeout=30)
+                new_at = _refresh_client_token(state)
+            if new_at and new_at != at:
+                headers = auth_headers(new_at)
+                r = SESSION.get(url, headers=headers, timeout=MEDIA_FETCH_TIMEOUT, stream=True)
         return r
 
+    r = None
+    streaming = False
     try:
         r = authorized_fetch(access_token)
-        if r.status_code != 200:
+        if r.status_code not in (200, 206):
+            r.close()
             app.logger.error("Proxy fetch failed (%s): %s", r.status_code, url)
             abort(r.status_code)
 
         ctype = r.headers.get("Content-Type", "application/octet-stream").lower()
-        data = r.content
 
-        if kind == "image" and ("heic" in ctype or "heif" in ctype):
-            if HEIF_ENABLED and Image is not None:
+        # Only HEIC needs the whole body (for conversion); everything else is streamed through
+        if byte_range:
+            mime = r.headers.get("Content-Type", "application/octet-stream")
+            resp = Response(iter_upstream(r), status=r.status_code, mimetype=mime)
+            for hdr in ("Content-Range", "Accept-Ranges"):
+                if r.headers.get(hdr):
+                    resp.headers[hdr] = r.headers[hdr]
+            if r.headers.get("Content-Length") and not r.headers.get("Content-Encoding"):
+                resp.headers["Content-Length"] = r.headers["Content-Length"]
+        elif kind == "image" and ("heic" in ctype or "heif" in ctype):
+            data = r.content
+            r.close()
+            if _ensure_heif():
                 try:
-                    img = Image.open(io.BytesIO(data))
-                    buf = io.BytesIO()
-                    img.convert("RGB").save(buf, format="JPEG", quality=90)
-                    buf.seek(0)
-                    resp = Response(buf.getvalue(), status=200, mimetype="image/jpeg")
-                    resp.headers["Cache-Control"] = "private, max-age=1800"
+                    jpeg = heic_to_jpeg(data, (w, h))
+                    proxy_cache_store(cache_key, jpeg, "image/jpeg")
+                    resp = Response(jpeg, status=200, mimetype="image/jpeg")
+                    resp.set_etag(etag)
+                    resp.last_modified = last_modified
+                    resp.headers["Cache-Control"] = CONTENT_CACHE_CONTROL
                     return resp
                 except Exception:
                     app.logger.exception("HEIC→JPEG conversion failed; falling back to raw bytes")
             else:
                 app.logger.warning("HEIC content but HEIF decoding not available; returning raw bytes")
-
-        resp = Response(data, status=200, mimetype=r.headers.get("Content-Type", "application/octet-stream"))
-        resp.headers["Cache-Control"] = "private, max-age=1800"
+            resp = Response(data, status=200, mimetype=r.headers.get("Content-Type", "application/octet-stream"))
+        else:
+            mime = r.headers.get("Content-Type", "application/octet-stream")
+            resp = Response(proxy_cache_tee(r, cache_key, mime), status=200, mimetype=mime)
+            if leader:
+                # Released once the body has been streamed and committed to the cache
+                resp.call_on_close(lambda: proxy_fetch_end(cache_key))
+                streaming = True
+            if r.headers.get("Content-Length") and not r.headers.get("Content-Encoding"):
+                resp.headers["Content-Length"] = r.headers["Content-Length"]
+        if kind == "video":
+            resp.headers.setdefault("Accept-Ranges", "bytes")
+        resp.set_etag(etag)
+        resp.last_modified = last_modified
+        resp.headers["Cache-Control"] = CONTENT_CACHE_CONTROL
         return resp
     except Exception:
+        if r is not None:
+            r.close()
         app.logger.exception("Proxy fetch exception for %s", url)
         abort(502)
+    finally:
+        if leader and not streaming:
+            proxy_fetch_end(cache_key)
 
 # ---- Serve local cached files ----
 @app.route("/local/<int:index>")
@@ -1037,18 +1824,26 @@ def local(index: int):
     items = read_cache_index()
     if index < 0 or index >= len(items):
         abort(404)
-    path = items[index].get('path')
-    if not path or not os.path.exists(path):
+    item = items[index]
+    path = item.get('path')
+    if not path:
+        abort(404)
+    # Stored at download time; indexes written before that derive it from the extension
+    mime = item.get('mime') or _EXT_MIME.get(path.rpartition('.')[2].lower(), 'application/octet-stream')
+    if X_ACCEL_REDIRECT_PREFIX:
+        resp = Response(mimetype=mime)
+        resp.headers["X-Accel-Redirect"] = X_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + os.path.basename(path)
+        resp.headers["Cache-Control"] = CONTENT_CACHE_CONTROL
+        return resp
+    # send_file's mtime/size ETag + Last-Modified make each loop a bodiless 304;
+    # same short max-age as /content since indexes are reused by the next pick
+    # (send_file stats the file anyway, so a missing one is caught there)
+    try:
+        resp = send_file(path, mimetype=mime, conditional=True)
+    except FileNotFoundError:
         abort(404)
-    ext = os.path.splitext(path)[1].lower()
-    mime = 'application/octet-stream'
-    if ext in ('.jpg','.jpeg'): mime='image/jpeg'
-    elif ext == '.png': mime='image/png'
-    elif ext == '.gif': mime='image/gif'
-    elif ext == '.webp': mime='image/webp'
-    elif ext == '.mp4': mime='video/mp4'
-    elif ext == '.webm': mime='video/webm'
-    return send_file(path, mimetype=mime, conditional=True)
+    resp.headers["Cache-Control"] = CONTENT_CACHE_CONTROL
+    return resp
 
 @app.route("/cache/clear")
 def cache_clear():
@@ -1060,24 +1855,44 @@ def cache_clear():
         app.logger.exception("Failed to clear cache"); flash("Failed to clear cache.")
     return redirect(url_for("diag"))
 
+# The item arrays embedded in the screensaver page, serialized (HTML-safe) once per
+# change of cache_index.json / selected_media.json instead of on every page load
+_PAYLOAD_CACHE = {"key": None, "local": None, "remote": None}
+
+
+def _screensaver_payloads(local_items: list, remote_items: list) -> tuple[Markup, Markup]:
+    key = (_json_mtime_ns(CACHE_INDEX), _json_mtime_ns(SELECTION_STORE), len(local_items), len(remote_items))
+    if _PAYLOAD_CACHE["key"] != key:
+        dumps = lambda o: orjson.dumps(o).decode("utf-8")
+        remote_kinds = [item_kind(it) for it in remote_items]
+        # Only what the JS reads; the full records stay server-side
+        local = [{"kind": it.get("kind"), "filename": it.get("filename")} for it in local_items]
+        remote = {
+            "kind": remote_kinds,
+            "src": [f"/content/{i}?kind={k}" for i, k in enumerate(remote_kinds)],
+            "name": [it.get("filename", "") for it in remote_items],
+        }
+        _PAYLOAD_CACHE.update(key=key, local=htmlsafe_json_dumps(local, dumps=dumps),
+                              remote=htmlsafe_json_dumps(remote, dumps=dumps))
+    return _PAYLOAD_CACHE["local"], _PAYLOAD_CACHE["remote"]
+
 @app.route("/screensaver")
 def screensaver():
     local_items = read_cache_index()
     remote_items = load_media_items()
     use_local = len(local_items) > 0
-    try: interval_seconds = int(request.args.get("interval", ADVANCE_SECONDS_DEFAULT))
-    except ValueError: interval_seconds = ADVANCE_SECONDS_DEFAULT
-    try: refresh_minutes = int(request.args.get("refresh", REFRESH_MINUTES_DEFAULT))
-    except ValueError: refresh_minutes = REFRESH_MINUTES_DEFAULT
+    interval_seconds = _safe_int(request.args.get("interval"), ADVANCE_SECONDS_DEFAULT)
+    refresh_minutes = _safe_int(request.args.get("refresh"), REFRESH_MINUTES_DEFAULT)
 
     if use_local:
         refresh_minutes = 0
+    local_json, remote_json = _screensaver_payloads(local_items, remote_items)
 
-    return render_template_string(
-        SCREENSAVER_TEMPLATE,
+    return render_template(
+        _TPL_SCREENSAVER,
         use_local=use_local,
-        local_items=local_items,
-        remote_items=remote_items,
+        local_json=local_json,
+        remote_json=remote_json,
         interval_seconds=interval_seconds,
         refresh_minutes=refresh_minutes,
         yt_video_id=YT_VIDEO_ID,
@@ -1089,16 +1904,17 @@ def screensaver():
 def diag():
     local_items = read_cache_index()
     remote_items = load_media_items()
-    return render_template_string(
-        DIAG_TEMPLATE,
+    return render_template(
+        _TPL_DIAG,
         local_items=local_items,
         remote_items=remote_items,
     )
 
 @app.route("/auth/signout")
 def auth_signout():
-    session.clear(); flash("Signed out."); return redirect(url_for("pick"))
+    client_state().clear(); session.clear(); flash("Signed out."); return redirect(url_for("pick"))
 
 if __name__ == "__main__":
     ensure_cache_dir()
+    start_token_refresher()
     app.run(host="0.0.0.0", port=5000, debug=False)
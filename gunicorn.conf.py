@@ -0,0 +1,16 @@
+# gunicorn -c gunicorn.conf.py wsgi:application
+import os
+
+bind = "0.0.0.0:5000"
+worker_class = "gthread"
+# Keep a single process: client state, the token cache and the proxy in-flight
+# map live in memory. Concurrency comes from threads (upstream I/O drops the GIL).
+workers = 1
+# Each in-flight /content fetch holds one thread while it streams from Google;
+# raise this (not workers) if several displays share the server
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+timeout = 120
+graceful_timeout = 30
+accesslog = None
+errorlog = "-"
+# No preload_app: wsgi.py starts the token refresher thread, which must run in the worker
@@ -0,0 +1,10 @@
+# WSGI entry point for production servers:
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#   waitress-serve --threads=16 --port=5000 wsgi:application
+# Imported once per worker process, so the refresher thread lives in the worker.
+from app import app, ensure_cache_dir, start_token_refresher
+
+ensure_cache_dir()
+start_token_refresher()
+
+application = app